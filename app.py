@@ -9,30 +9,127 @@ else:
 # Change CWD so that all relative opens() work off base_dir
 os.chdir(base_dir)
 
-from flask import Flask, render_template, request, jsonify, Response
-import json, traceback
+from flask import Flask, render_template, request, jsonify, Response, g
+from collections import OrderedDict
+import hashlib
+import json, time, traceback
 import data_loader
+import metrics
 import weather
 import inat
 from iucn_loader import iucn_bp  # Make sure this file exists
 import webbrowser
 import threading
 from sqlite_iucn_loader import sqlite_iucn_bp
+from export import export_bp
+from hydrobasin_loader import hydrobasin_bp
 import csv
-import pandas as pd
 
 app = Flask(__name__)
 app.register_blueprint(iucn_bp)  # Register the IUCN blueprint AFTER app is created
 app.register_blueprint(sqlite_iucn_bp)
+app.register_blueprint(export_bp)
+app.register_blueprint(hydrobasin_bp)
+
+# Heavy modules (pandas, meteostat, geopandas) and datasets are loaded on
+# first use, or ahead of time by the warmup thread started in __main__, so
+# the server can start accepting requests immediately.
+_herp_orders = None
+_initial_stations = None
+_data_lock = threading.Lock()
+
+
+def get_herp_orders():
+    """Herp orders from species_files, loaded once on first use."""
+    global _herp_orders
+    if _herp_orders is None:
+        with _data_lock:
+            if _herp_orders is None:
+                _herp_orders = data_loader.load_herp_orders()
+    return _herp_orders
+
+
+def get_initial_stations():
+    """
+    The China/Taiwan station list shown on the initial page, loaded once.
+    An empty result (e.g. Meteostat unreachable) is not kept so the next
+    request tries again.
+    """
+    global _initial_stations
+    if _initial_stations is None:
+        with _data_lock:
+            if _initial_stations is None:
+                stations = data_loader.load_weather_stations()
+                if not stations:
+                    return stations
+                _initial_stations = stations
+    return _initial_stations
+
+
+def warmup():
+    """Imports heavy modules and loads startup datasets in the background."""
+    start = time.perf_counter()
+    for module in ("pandas", "meteostat", "geopandas"):
+        try:
+            __import__(module)
+        except ImportError as e:
+            print(f"DEBUG: Warmup could not import {module}: {e}")
+    try:
+        get_herp_orders()
+        get_initial_stations()
+    except Exception:
+        # Requests will retry the load on first use.
+        traceback.print_exc()
+    print(f"DEBUG: Warmup finished in {time.perf_counter() - start:.2f} seconds")
+
+
+def start_warmup():
+    thread = threading.Thread(target=warmup, name="warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
 
-# Load herp orders from species_files.
-herp_orders = data_loader.load_herp_orders()
+
+@app.after_request
+def record_request_metrics(response):
+    # Label by URL rule rather than raw path so query strings and IDs
+    # don't explode the series count. Latency is observed when the response
+    # is closed, i.e. after a streamed body has been fully sent.
+    start = g.pop("request_start", None)
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    if start is not None:
+        method = request.method
+        status = response.status_code
+
+        def observe_latency():
+            metrics.REQUEST_LATENCY.observe(
+                time.perf_counter() - start,
+                route=route,
+                method=method,
+                status=status,
+            )
+
+        response.call_on_close(observe_latency)
+    size = response.calculate_content_length()
+    if size is not None:
+        metrics.RESPONSE_SIZE.observe(size, route=route)
+    return response
+
+
+@app.route("/metrics")
+def metrics_endpoint():
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
 
 
 @app.route("/")
 def index():
     # For the initial page load, load stations covering China/Taiwan.
-    station_list = data_loader.load_weather_stations()
+    station_list = get_initial_stations()
+    herp_orders = get_herp_orders()
     orders = list(herp_orders.keys())
     return render_template(
         "index.html",
@@ -55,6 +152,33 @@ def stations():
         return jsonify({"error": str(e)}), 400
 
 
+# Memoized /generate_graph results keyed by (species, sorted station ids,
+# start date, end date). Each entry remembers the versions of the cached
+# observation and climate data it was built from and is recomputed once any
+# of them has been refreshed.
+GRAPH_CACHE_SIZE = 128
+_graph_cache = OrderedDict()
+_graph_cache_lock = threading.Lock()
+
+
+def _graph_input_versions(species, station_ids, start_date, end_date):
+    return (inat.cache_version(species),) + tuple(
+        weather.cache_version(sid, start_date, end_date) for sid in station_ids
+    )
+
+
+def _graph_response(response_data, etag):
+    # The browser sends back the last ETag in If-None-Match (see index.html),
+    # so an unchanged graph costs a 304 with no body.
+    if etag in request.if_none_match:
+        response = Response(status=304)
+    else:
+        response = jsonify(response_data)
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
 @app.route("/generate_graph", methods=["POST"])
 def generate_graph():
     try:
@@ -71,14 +195,30 @@ def generate_graph():
                 400,
             )
 
-        stations = data_loader.load_weather_stations()
-        station_map = {s["id"]: s["coords"] for s in stations}
-
         start_date = "2015-01-01"
         end_date = "2025-04-01"
 
+        # The key and the computation both use the de-duplicated set, so a
+        # repeated station isn't weighted twice in the mean.
+        station_key = tuple(sorted(set(selected_station_ids)))
+        cache_key = (species, station_key, start_date, end_date)
+        versions = _graph_input_versions(species, station_key, start_date, end_date)
+        with _graph_cache_lock:
+            cached = _graph_cache.get(cache_key)
+            if cached is not None and cached[0] == versions:
+                _graph_cache.move_to_end(cache_key)
+            else:
+                cached = None
+        if cached is not None:
+            metrics.CACHE_REQUESTS.inc(cache="graph", result="hit")
+            return _graph_response(cached[1], cached[2])
+        metrics.CACHE_REQUESTS.inc(cache="graph", result="miss")
+
+        stations = get_initial_stations()
+        station_map = {s["id"]: s["coords"] for s in stations}
+
         combined_df = weather.combine_station_weather(
-            selected_station_ids, station_map, start_date, end_date
+            list(station_key), station_map, start_date, end_date
         )
         if combined_df is None:
             return jsonify({"error": "Failed to retrieve weather data."}), 500
@@ -124,7 +264,22 @@ def generate_graph():
             "observations": observations_list,
             "total_obs": total_obs,
         }
-        return jsonify(response_data)
+        etag = hashlib.sha1(
+            json.dumps(response_data, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+
+        # Only memoize results built entirely from complete, cached inputs; a
+        # truncated iNat crawl or a failed station should be retried next time.
+        if inat.is_cached(species) and all(
+            weather.is_cached(sid, start_date, end_date) for sid in station_key
+        ):
+            versions = _graph_input_versions(species, station_key, start_date, end_date)
+            with _graph_cache_lock:
+                _graph_cache[cache_key] = (versions, response_data, etag)
+                _graph_cache.move_to_end(cache_key)
+                while len(_graph_cache) > GRAPH_CACHE_SIZE:
+                    _graph_cache.popitem(last=False)
+        return _graph_response(response_data, etag)
     except Exception as e:
         traceback.print_exc()
         return jsonify({"error": str(e)}), 500
@@ -149,6 +304,8 @@ def get_station_climate():
     if not station_id:
         return jsonify({"error": "No station_id provided"}), 400
 
+    import pandas as pd
+
     start_date = "2015-01-01"
     end_date = "2025-04-01"
     df = weather.fetch_station_weather(station_id, start_date, end_date)
@@ -267,4 +424,5 @@ def species_suggestions():
 
 
 if __name__ == "__main__":
+    start_warmup()
     app.run(debug=False, host="0.0.0.0", port=int(os.environ.get("PORT", 5000)))
@@ -0,0 +1,132 @@
+# benchmarks/cold_start.py
+"""
+Measures cold start from launching the server process until (a) it answers
+its first HTTP request and (b) it serves the map page, and fails if either
+exceeds its budget.
+
+    python -m benchmarks.cold_start                     # source build
+    python -m benchmarks.cold_start --exe dist/app/app.exe   # frozen build
+
+(a) probes /metrics, which touches none of the lazily loaded modules, so it
+tracks how soon the server binds. (b) then fetches /, which waits for
+meteostat and the initial station list, i.e. what the user actually sees.
+"""
+
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+# Budgets in seconds from process launch to the first response on /metrics.
+SOURCE_BUDGET = 2.0
+FROZEN_BUDGET = 4.0
+# Budgets in seconds from process launch to the map page (/) being served.
+SOURCE_PAGE_BUDGET = 8.0
+FROZEN_PAGE_BUDGET = 12.0
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_for(url, proc, start, timeout):
+    """
+    Polls url until it returns 200 and returns the seconds since start.
+    Connection errors mean "not up yet"; an HTTP error status is a failure.
+    """
+    while time.perf_counter() - start < timeout:
+        if proc.poll() is not None:
+            raise RuntimeError(f"server exited with code {proc.returncode}")
+        remaining = max(timeout - (time.perf_counter() - start), 1)
+        try:
+            with urllib.request.urlopen(url, timeout=remaining) as r:
+                if r.status == 200:
+                    return time.perf_counter() - start
+        except urllib.error.HTTPError as e:
+            raise RuntimeError(f"{url} returned status {e.code}")
+        except OSError:
+            time.sleep(0.02)
+    raise TimeoutError(f"no response from {url} within {timeout} seconds")
+
+
+def measure_once(command, port, timeout):
+    """Returns (seconds to first response, seconds to map page)."""
+    env = dict(os.environ, PORT=str(port))
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    base = f"http://127.0.0.1:{port}"
+    try:
+        first = _wait_for(base + "/metrics", proc, start, timeout)
+        page = _wait_for(base + "/", proc, start, timeout)
+        return first, page
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def _median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--exe", help="Path to the frozen PyInstaller executable.")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=None,
+        help="Override the first-response budget (s).",
+    )
+    parser.add_argument(
+        "--page-budget",
+        type=float,
+        default=None,
+        help="Override the map page budget (s).",
+    )
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args(argv)
+
+    if args.exe:
+        command = [args.exe]
+        budget = args.budget or FROZEN_BUDGET
+        page_budget = args.page_budget or FROZEN_PAGE_BUDGET
+        label = "frozen"
+    else:
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        command = [sys.executable, os.path.join(root, "app.py")]
+        budget = args.budget or SOURCE_BUDGET
+        page_budget = args.page_budget or SOURCE_PAGE_BUDGET
+        label = "source"
+
+    runs = [measure_once(command, free_port(), args.timeout) for _ in range(args.runs)]
+    failed = False
+    for name, values, limit in (
+        ("first response", [r[0] for r in runs], budget),
+        ("map page", [r[1] for r in runs], page_budget),
+    ):
+        median = _median(values)
+        print(
+            f"{label} cold start, {name}: median {median:.2f}s, "
+            f"min {min(values):.2f}s, max {max(values):.2f}s (budget {limit:.2f}s)"
+        )
+        if median > limit:
+            print(f"FAIL: {name} exceeds budget")
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,411 @@
+# benchmarks/fakes.py
+"""
+Offline stand-ins for the upstream services used by the app:
+
+  - FakeUpstreamServer: a local HTTP server speaking enough of the iNat
+    /v1/observations API (paginated, X-Total-Entries, optional latency and
+    429 throttling) and serving R2-style /polygon_export/<species>.geojson.
+  - fake_meteostat_module(): a drop-in module exposing Monthly and Stations
+    backed by synthetic data, installed into sys.modules before the app's
+    weather/data_loader modules are imported.
+  - write_* helpers producing synthetic checklists, shapefiles and the
+    hydrobasin index.
+"""
+
+import bisect
+import json
+import math
+import os
+import random
+import sqlite3
+import threading
+import time
+import types
+from datetime import date, datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+# iNat rejects page/per_page requests beyond this many results.
+MAX_OFFSET_RESULTS = 10_000
+
+GENERA = [
+    "Gloydius",
+    "Elaphe",
+    "Takydromus",
+    "Plestiodon",
+    "Gekko",
+    "Naja",
+    "Trimeresurus",
+    "Oligodon",
+    "Lycodon",
+    "Sphenomorphus",
+    "Japalura",
+    "Mauremys",
+    "Cuora",
+    "Pelodiscus",
+    "Eremias",
+    "Phrynocephalus",
+]
+
+
+def species_name(i):
+    """Deterministic binomial for index i (e.g. 'Gloydius sp00042')."""
+    return f"{GENERA[i % len(GENERA)]} sp{i:05d}"
+
+
+def synthetic_observations(species, count, seed=0):
+    """
+    Returns `count` observation dicts shaped like iNat results (id,
+    observed_on, geojson point), spread over 2015-2024 and Greater China.
+    """
+    rng = random.Random(f"{species}:{seed}")
+    start = date(2015, 1, 1).toordinal()
+    span = date(2024, 12, 31).toordinal() - start
+    results = []
+    for i in range(count):
+        lat = rng.uniform(18, 54)
+        lon = rng.uniform(73, 136)
+        observed = date.fromordinal(start + rng.randrange(span)).isoformat()
+        results.append(
+            {
+                "id": i + 1,
+                "observed_on": observed,
+                "location": f"{lat:.5f},{lon:.5f}",
+                "geojson": {"type": "Point", "coordinates": [lon, lat]},
+                "taxon": {"name": species},
+            }
+        )
+    return results
+
+
+def load_recording(path):
+    """
+    Loads a recorded iNat crawl written by record_inat_pages(): a JSON file
+    holding {"species": ..., "total": ..., "results": [...]}.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def record_inat_pages(species, path, max_pages=None):
+    """
+    Records a live iNat crawl for `species` to `path` so later benchmark
+    runs can replay it offline. Needs network access.
+    """
+    import inat
+
+    inat.clear_inat_cache()
+    results, total = inat.fetch_all_inat_data(species, force=True)
+    if max_pages is not None:
+        results = results[: max_pages * inat.PER_PAGE]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"species": species, "total": total, "results": results}, f)
+    return len(results)
+
+
+class FakeUpstreamServer:
+    """
+    Threaded local HTTP server standing in for api.inaturalist.org and the R2
+    polygon bucket.
+
+    latency: seconds slept before answering each request.
+    throttle_every: if > 0, every Nth request gets a 429 with Retry-After.
+    retry_after: value of the Retry-After header sent with a 429.
+    """
+
+    def __init__(self, latency=0.0, throttle_every=0, retry_after=0):
+        self.latency = latency
+        self.throttle_every = throttle_every
+        self.retry_after = retry_after
+        self.observations = {}
+        self.polygons = {}
+        self.request_count = 0
+        self.throttled_count = 0
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def add_species(self, species, results, total=None):
+        self.observations[species.lower()] = (results, total or len(results))
+
+    def add_polygon(self, species, geojson):
+        key = species.strip().lower().replace(" ", "_") + ".geojson"
+        self.polygons[key] = json.dumps(geojson).encode("utf-8")
+
+    def start(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out as separate writes; with Nagle on, a
+            # reused keep-alive connection stalls ~40 ms on the client's
+            # delayed ACK for every request.
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body=b"", headers=None):
+                self.send_response(status)
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                with fake._lock:
+                    fake.request_count += 1
+                    n = fake.request_count
+                if fake.latency:
+                    time.sleep(fake.latency)
+                if fake.throttle_every and n % fake.throttle_every == 0:
+                    with fake._lock:
+                        fake.throttled_count += 1
+                    self._send(429, headers={"Retry-After": str(fake.retry_after)})
+                    return
+
+                url = urlparse(self.path)
+                if url.path == "/v1/observations":
+                    self._observations(parse_qs(url.query))
+                elif url.path.startswith("/polygon_export/"):
+                    body = fake.polygons.get(url.path.rsplit("/", 1)[-1])
+                    if body is None:
+                        self._send(404)
+                    else:
+                        self._send(200, body, {"Content-Type": "application/json"})
+                else:
+                    self._send(404)
+
+            def _observations(self, query):
+                species = query.get("taxon_name", [""])[0].lower()
+                page = int(query.get("page", ["1"])[0])
+                per_page = int(query.get("per_page", ["30"])[0])
+                results, total = fake.observations.get(species, ([], 0))
+                if "id_above" in query:
+                    # Keyset pagination; results are stored in ascending id order.
+                    id_above = int(query["id_above"][0])
+                    ids = [obs["id"] for obs in results]
+                    start = bisect.bisect_right(ids, id_above)
+                    chunk = results[start : start + per_page]
+                elif page * per_page > MAX_OFFSET_RESULTS:
+                    # Like iNat, refuse page-based requests past 10,000 results.
+                    self._send(403)
+                    return
+                else:
+                    chunk = results[(page - 1) * per_page : page * per_page]
+                body = json.dumps(
+                    {
+                        "total_results": total,
+                        "page": page,
+                        "per_page": per_page,
+                        "results": chunk,
+                    }
+                ).encode("utf-8")
+                self._send(
+                    200,
+                    body,
+                    {"Content-Type": "application/json", "X-Total-Entries": str(total)},
+                )
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def fake_meteostat_module(latency=0.0, station_count=2000, seed=0):
+    """
+    Builds a module object exposing Monthly and Stations with the subset of
+    the meteostat API the app uses. Monthly data is a deterministic seasonal
+    curve per station; `latency` seconds are slept per fetch to mimic
+    meteostat's download/parse cost.
+    """
+    module = types.ModuleType("meteostat")
+
+    class Monthly:
+        def __init__(self, station, start, end):
+            self.station = station
+            self.start = start
+            self.end = end
+
+        def fetch(self):
+            if latency:
+                time.sleep(latency)
+            index = pd.date_range(self.start, self.end, freq="MS", name="time")
+            rng = random.Random(f"{self.station}:{seed}")
+            offset = rng.uniform(-10, 10)
+            months = index.month.to_numpy()
+            tavg = [
+                15 + offset + 12 * math.sin((m - 4) / 12 * 2 * math.pi) for m in months
+            ]
+            prcp = [
+                max(0.0, 80 + 120 * math.sin((m - 3) / 12 * 2 * math.pi))
+                for m in months
+            ]
+            return pd.DataFrame(
+                {
+                    "tavg": tavg,
+                    "tmin": [t - 5 for t in tavg],
+                    "tmax": [t + 5 for t in tavg],
+                    "prcp": prcp,
+                },
+                index=index,
+            )
+
+    class Stations:
+        def __init__(self):
+            self._bounds = None
+
+        def bounds(self, top_left, bottom_right):
+            self._bounds = (top_left, bottom_right)
+            return self
+
+        def fetch(self):
+            rng = random.Random(seed)
+            rows = []
+            for i in range(station_count):
+                rows.append(
+                    {
+                        "id": f"{50000 + i:05d}",
+                        "name": f"Station {i}",
+                        "country": "CN",
+                        "latitude": rng.uniform(18, 54),
+                        "longitude": rng.uniform(73, 136),
+                        "elevation": rng.uniform(0, 4000),
+                        "monthly_start": datetime(1990, 1, 1),
+                        "monthly_end": datetime(2025, 3, 1),
+                    }
+                )
+            df = pd.DataFrame(rows).set_index("id")
+            if self._bounds:
+                (north, west), (south, east) = self._bounds
+                df = df[
+                    df["latitude"].between(south, north)
+                    & df["longitude"].between(west, east)
+                ]
+            return df
+
+    module.Monthly = Monthly
+    module.Stations = Stations
+    return module
+
+
+def write_checklists(root, species_count, seed=0):
+    """
+    Writes all_reptiles_world.csv and species_files/*.txt under `root` with
+    `species_count` IUCN species, roughly a third of which also appear in
+    the Reptile Database text files.
+    """
+    rng = random.Random(seed)
+    names = [species_name(i) for i in range(species_count)]
+    with open(os.path.join(root, "all_reptiles_world.csv"), "w", encoding="utf-8") as f:
+        f.write("species,family\n")
+        for name in names:
+            f.write(f"{name},Fakeidae\n")
+    folder = os.path.join(root, "species_files")
+    os.makedirs(folder, exist_ok=True)
+    orders = ["lizards", "snakes", "turtles", "crocodilians"]
+    chosen = rng.sample(names, species_count // 3)
+    for i, order in enumerate(orders):
+        with open(os.path.join(folder, f"{order}.txt"), "w", encoding="utf-8") as f:
+            for name in chosen[i :: len(orders)]:
+                f.write(name + "\n")
+    return names
+
+
+def synthetic_polygon(species, vertices=64, seed=0):
+    """A single GeoJSON FeatureCollection with one ragged polygon."""
+    rng = random.Random(f"{species}:{seed}")
+    cx, cy = rng.uniform(80, 130), rng.uniform(20, 50)
+    ring = []
+    for k in range(vertices):
+        angle = 2 * math.pi * k / vertices
+        r = rng.uniform(1.5, 3.0)
+        ring.append([cx + r * math.cos(angle), cy + r * math.sin(angle)])
+    ring.append(ring[0])
+    return {
+        "type": "FeatureCollection",
+        "features": [
+            {
+                "type": "Feature",
+                "properties": {"sci_name": species},
+                "geometry": {"type": "Polygon", "coordinates": [ring]},
+            }
+        ],
+    }
+
+
+def write_shapefiles(folder, species_names, files=2, vertices=64, seed=0):
+    """
+    Writes `files` shapefiles into `folder`, splitting `species_names`
+    between them, in the layout iucn_loader expects (sci_name attribute).
+    Requires geopandas and shapely.
+    """
+    import geopandas as gpd
+    from shapely.geometry import shape
+
+    os.makedirs(folder, exist_ok=True)
+    for i in range(files):
+        chunk = species_names[i::files]
+        rows = []
+        for name in chunk:
+            feature = synthetic_polygon(name, vertices, seed)["features"][0]
+            rows.append({"sci_name": name, "geometry": shape(feature["geometry"])})
+        gdf = gpd.GeoDataFrame(rows, geometry="geometry", crs="EPSG:4326")
+        gdf.to_file(os.path.join(folder, f"REPTILES_PART{i + 1}.shp"))
+
+
+def write_hydrobasin_index(
+    db_path, species_names, basin_count, per_species=5, vertices=32, seed=0
+):
+    """
+    Builds a hydrobasin index at `db_path` through hydrobasin_loader: a CSV
+    assigning each species `per_species` basins out of `basin_count` (the
+    first species gets a tenth of all basins), plus one ragged polygon per
+    basin. Requires shapely (but not geopandas).
+    """
+    from shapely.geometry import Polygon
+
+    import hydrobasin_loader
+
+    rng = random.Random(seed)
+    csv_folder = os.path.join(os.path.dirname(os.path.abspath(db_path)), "hb_csv")
+    os.makedirs(csv_folder, exist_ok=True)
+    with open(os.path.join(csv_folder, "hydrobasins.csv"), "w", encoding="utf-8") as f:
+        f.write("sci_name,hybas_id\n")
+        for i, name in enumerate(species_names):
+            count = max(per_species, basin_count // 10) if i == 0 else per_species
+            for hybas_id in rng.sample(range(1, basin_count + 1), count):
+                f.write(f"{name},{hybas_id}\n")
+    hydrobasin_loader.build_hydrobasin_index(
+        csv_folder, os.path.join(csv_folder, "no_shapefiles"), db_path
+    )
+
+    rows = []
+    for hybas_id in range(1, basin_count + 1):
+        cx, cy = rng.uniform(73, 136), rng.uniform(18, 54)
+        ring = []
+        for k in range(vertices):
+            angle = 2 * math.pi * k / vertices
+            r = rng.uniform(0.3, 1.0)
+            ring.append((cx + r * math.cos(angle), cy + r * math.sin(angle)))
+        geom = Polygon(ring)
+        rows.append((hybas_id, *geom.bounds, geom.wkb))
+    conn = sqlite3.connect(db_path)
+    conn.executemany("INSERT INTO basins VALUES (?, ?, ?, ?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
@@ -0,0 +1,367 @@
+# benchmarks/run.py
+"""
+Offline benchmark suite for the app's hot paths.
+
+Run from the repository root:
+
+    python -m benchmarks.run --scale small --scale medium
+    python -m benchmarks.run --scale large --latency 0.05 --throttle-every 20
+    python -m benchmarks.run --only inat --recording gloydius.json
+
+Every upstream is replaced by a local stand-in (see benchmarks/fakes.py), so
+no network access is needed. For each hot path the suite reports latency
+percentiles, throughput and peak traced memory.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks import fakes
+
+SCALES = {
+    "small": {
+        "observations": 1_000,
+        "stations": 3,
+        "checklist": 2_000,
+        "shapefile_species": 200,
+        "hydrobasins": 1_000,
+    },
+    "medium": {
+        "observations": 10_000,
+        "stations": 10,
+        "checklist": 20_000,
+        "shapefile_species": 2_000,
+        "hydrobasins": 10_000,
+    },
+    "large": {
+        "observations": 50_000,
+        "stations": 10,
+        "checklist": 100_000,
+        "shapefile_species": 10_000,
+        "hydrobasins": 50_000,
+    },
+}
+
+HOT_PATHS = [
+    "inat",
+    "weather",
+    "suggestions",
+    "iucn_polygon",
+    "iucn_polygon_r2",
+    "hydrobasins",
+]
+APP_PATHS = ("suggestions", "iucn_polygon", "iucn_polygon_r2", "hydrobasins")
+
+
+def percentile(sorted_values, pct):
+    """Linear-interpolated percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def measure(name, fn, repeat, items=1):
+    """
+    Calls fn() `repeat` times for timing, then once more under tracemalloc
+    for peak memory (kept separate because tracing slows allocation).
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    timings.sort()
+    total = sum(timings)
+    return {
+        "path": name,
+        "calls": repeat,
+        "p50_ms": percentile(timings, 50) * 1000,
+        "p95_ms": percentile(timings, 95) * 1000,
+        "p99_ms": percentile(timings, 99) * 1000,
+        "ops_per_s": repeat / total if total else 0.0,
+        "items_per_s": repeat * items / total if total else 0.0,
+        "peak_mb": peak / 2**20,
+    }
+
+
+def install_fake_meteostat(args):
+    # Must happen before weather/data_loader (or app) are imported.
+    sys.modules["meteostat"] = fakes.fake_meteostat_module(
+        latency=args.meteostat_latency
+    )
+
+
+def run_scale(scale_name, args, server, workdir):
+    import http_client
+    import inat
+    import weather
+
+    scale = SCALES[scale_name]
+    results = []
+    selected = set(args.only or HOT_PATHS)
+
+    # Stand-in data for this scale.
+    if args.recording:
+        recording = fakes.load_recording(args.recording)
+        species = recording["species"]
+        server.add_species(species, recording["results"], recording["total"])
+        obs_count = len(recording["results"])
+    else:
+        species = fakes.species_name(0)
+        obs_count = scale["observations"]
+        server.add_species(species, fakes.synthetic_observations(species, obs_count))
+
+    scale_dir = os.path.join(workdir, scale_name)
+    os.makedirs(scale_dir, exist_ok=True)
+    os.chdir(scale_dir)
+    checklist = fakes.write_checklists(scale_dir, scale["checklist"])
+    for name in checklist[:50]:
+        server.add_polygon(name, fakes.synthetic_polygon(name))
+
+    inat.INAT_URL = server.base_url + "/v1/observations"
+    if args.base_backoff is not None:
+        http_client.BASE_BACKOFF = args.base_backoff
+
+    if "inat" in selected:
+        before = server.request_count
+
+        def fetch_inat():
+            inat.fetch_all_inat_data(species, force=True)
+
+        row = measure("inat.fetch_all_inat_data", fetch_inat, args.repeat, obs_count)
+        row["upstream_requests"] = server.request_count - before
+        results.append(row)
+
+    if "weather" in selected:
+        station_ids = [f"{50000 + i:05d}" for i in range(scale["stations"])]
+
+        def combine():
+            # Cold path: every call goes to (fake) Meteostat and merges.
+            weather.clear_weather_cache()
+            weather.combine_station_weather(station_ids, {}, "2015-01-01", "2025-04-01")
+
+        def combine_cached():
+            weather.combine_station_weather(station_ids, {}, "2015-01-01", "2025-04-01")
+
+        results.append(
+            measure(
+                "weather.combine_station_weather",
+                combine,
+                args.repeat,
+                len(station_ids),
+            )
+        )
+        combine_cached()  # Prime the station cache.
+        results.append(
+            measure(
+                "weather.combine_station_weather (cached)",
+                combine_cached,
+                args.repeat,
+                len(station_ids),
+            )
+        )
+
+    app_module = None
+    if selected & set(APP_PATHS):
+        app_module = import_app()
+        os.chdir(scale_dir)
+
+    if app_module is None:
+        for path in APP_PATHS:
+            if path in selected:
+                print(f"  skipping {path}: app could not be imported")
+        return results
+
+    client = app_module.app.test_client()
+
+    if "suggestions" in selected:
+        query = fakes.GENERA[0].lower()
+
+        def suggest():
+            client.get("/species_suggestions", query_string={"query": query})
+
+        results.append(measure("/species_suggestions", suggest, args.repeat))
+
+    if "iucn_polygon" in selected:
+        try:
+            fakes.write_shapefiles(
+                os.path.join(scale_dir, "IUCN_files", "reptilia_polygon"),
+                checklist[: scale["shapefile_species"]],
+            )
+        except ImportError as e:
+            print(f"  skipping iucn_polygon: {e}")
+        else:
+            # Worst case: the species lives in the last shapefile read.
+            target = checklist[: scale["shapefile_species"]][-1]
+
+            def polygon():
+                client.get("/get_iucn_polygon", query_string={"species": target})
+
+            results.append(measure("/get_iucn_polygon", polygon, args.repeat))
+
+    if "iucn_polygon_r2" in selected:
+        import sqlite_iucn_loader
+
+        sqlite_iucn_loader.BASE_URL = server.base_url + "/polygon_export/"
+        target = checklist[0]
+
+        def polygon_r2():
+            client.get("/get_iucn_polygon_sqlite", query_string={"species": target})
+
+        results.append(measure("/get_iucn_polygon_sqlite", polygon_r2, args.repeat))
+
+    if "hydrobasins" in selected:
+        import hydrobasin_loader
+
+        hydrobasin_loader.HYDROBASIN_DB = os.path.join(scale_dir, "hydrobasin_index.db")
+        try:
+            fakes.write_hydrobasin_index(
+                hydrobasin_loader.HYDROBASIN_DB, checklist, scale["hydrobasins"]
+            )
+        except ImportError as e:
+            print(f"  skipping hydrobasins: {e}")
+        else:
+            # The species with the most basins, viewed over eastern China.
+            viewport = {"north": 42, "west": 100, "south": 22, "east": 122}
+
+            def hydrobasins():
+                client.get(
+                    "/get_hydrobasins",
+                    query_string={"species": checklist[0], **viewport},
+                )
+
+            results.append(measure("/get_hydrobasins", hydrobasins, args.repeat))
+
+    return results
+
+
+def import_app():
+    """
+    Imports app.py (which chdirs to its own folder on import). Returns None
+    if an optional dependency such as geopandas is missing.
+    """
+    cwd = os.getcwd()
+    try:
+        import app
+    except ImportError as e:
+        print(f"  could not import app: {e}")
+        return None
+    finally:
+        os.chdir(cwd)
+    return app
+
+
+def print_table(scale_name, rows):
+    print(f"\n== scale: {scale_name} ==")
+    header = (
+        f"{'path':42} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+        f"{'ops/s':>9} {'items/s':>11} {'peak MB':>8}"
+    )
+    print(header)
+    print("-" * len(header))
+    for r in rows:
+        print(
+            f"{r['path']:42} {r['p50_ms']:9.2f} {r['p95_ms']:9.2f} {r['p99_ms']:9.2f} "
+            f"{r['ops_per_s']:9.2f} {r['items_per_s']:11.1f} {r['peak_mb']:8.2f}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--scale",
+        action="append",
+        choices=sorted(SCALES),
+        help="Data scale to run (repeatable; default: small).",
+    )
+    parser.add_argument(
+        "--only", action="append", choices=HOT_PATHS, help="Restrict to a hot path."
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="Timed calls per path.")
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="Fake upstream latency (s)."
+    )
+    parser.add_argument(
+        "--meteostat-latency",
+        type=float,
+        default=0.0,
+        help="Per-station fake Meteostat fetch latency (s).",
+    )
+    parser.add_argument(
+        "--throttle-every",
+        type=int,
+        default=0,
+        help="Return 429 on every Nth upstream request (0 disables).",
+    )
+    parser.add_argument(
+        "--retry-after", type=int, default=0, help="Retry-After sent with a 429."
+    )
+    parser.add_argument(
+        "--base-backoff",
+        type=float,
+        default=None,
+        help="Override http_client.BASE_BACKOFF (s) for throttled runs.",
+    )
+    parser.add_argument(
+        "--recording", help="Replay a recorded iNat crawl instead of synthetic data."
+    )
+    parser.add_argument(
+        "--record",
+        nargs=2,
+        metavar=("SPECIES", "PATH"),
+        help="Record a live iNat crawl to PATH and exit (needs network).",
+    )
+    parser.add_argument("--json", help="Also write results to this JSON file.")
+    args = parser.parse_args(argv)
+
+    if args.record:
+        n = fakes.record_inat_pages(*args.record)
+        print(f"Recorded {n} observations to {args.record[1]}")
+        return 0
+
+    install_fake_meteostat(args)
+    server = fakes.FakeUpstreamServer(
+        latency=args.latency,
+        throttle_every=args.throttle_every,
+        retry_after=args.retry_after,
+    ).start()
+    workdir = tempfile.mkdtemp(prefix="herps_bench_")
+    cwd = os.getcwd()
+    report = {}
+    try:
+        for scale_name in args.scale or ["small"]:
+            rows = run_scale(scale_name, args, server, workdir)
+            report[scale_name] = rows
+            print_table(scale_name, rows)
+        print(
+            f"\nupstream requests: {server.request_count} "
+            f"(throttled: {server.throttled_count})"
+        )
+    finally:
+        os.chdir(cwd)
+        server.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,9 @@
 # data_loader.py
 import os
-import pandas as pd
-from meteostat import Stations
+import metrics
+
+# pandas and meteostat are imported inside the station loaders so that
+# importing this module (and therefore app.py) stays cheap at startup.
 
 
 def load_species_from_file(filepath):
@@ -48,8 +50,13 @@ def load_weather_stations():
       - monthly_start: first day on record for monthly data (as string)
       - monthly_end: last day on record for monthly data (as string)
     """
+    import pandas as pd
+    from meteostat import Stations
+
     try:
-        stations_df = Stations().bounds((54, 73), (18, 136)).fetch().reset_index()
+        with metrics.upstream_call("meteostat"):
+            stations_df = Stations().bounds((54, 73), (18, 136)).fetch()
+        stations_df = stations_df.reset_index()
         print(f"DEBUG: Number of stations found for initial view: {len(stations_df)}")
 
         station_list = []
@@ -84,11 +91,12 @@ def get_stations_by_bounds(north, west, south, east):
     Returns a list of station dictionaries (same structure as load_weather_stations()).
     """
     import pandas as pd
+    from meteostat import Stations
 
     try:
-        stations_df = (
-            Stations().bounds((north, west), (south, east)).fetch().reset_index()
-        )
+        with metrics.upstream_call("meteostat"):
+            stations_df = Stations().bounds((north, west), (south, east)).fetch()
+        stations_df = stations_df.reset_index()
         print(f"DEBUG: Number of stations found in bounds: {len(stations_df)}")
 
         station_list = []
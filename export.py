@@ -0,0 +1,202 @@
+# export.py
+import csv
+import io
+import json
+from flask import Blueprint, Response, request, jsonify
+import inat
+import weather
+
+export_bp = Blueprint("export", __name__)
+
+# Rows serialised per chunk; bounds the memory used for the output regardless
+# of how many observations the species has.
+EXPORT_BATCH_ROWS = 5000
+
+EXPORT_COLUMNS = [
+    "id",
+    "species",
+    "observed_on",
+    "latitude",
+    "longitude",
+    "tavg",
+    "prcp",
+]
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+
+def iter_export_rows(species, observations, climate):
+    """
+    Yields one dict per observation with its coordinates and the selected
+    stations' mean climate for the observation's year and month (not a
+    12-month climatology).
+    """
+    for obs in observations:
+        observed_on = obs.get("observed_on")
+        lat = lon = None
+        geo = obs.get("geojson")
+        if geo and geo.get("type") == "Point":
+            lon, lat = geo.get("coordinates", [None, None])
+        tavg = prcp = None
+        if observed_on and len(observed_on) >= 7:
+            try:
+                key = (int(observed_on[:4]), int(observed_on[5:7]))
+                tavg, prcp = climate.get(key, (None, None))
+            except ValueError:
+                pass
+        yield {
+            "id": obs.get("id"),
+            "species": species,
+            "observed_on": observed_on,
+            "latitude": lat,
+            "longitude": lon,
+            "tavg": tavg,
+            "prcp": prcp,
+        }
+
+
+def _batches(rows, size=EXPORT_BATCH_ROWS):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def stream_csv(rows):
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=EXPORT_COLUMNS)
+    writer.writeheader()
+    for batch in _batches(rows):
+        writer.writerows(batch)
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue()
+
+
+def stream_ndjson(rows):
+    for batch in _batches(rows):
+        yield "".join(json.dumps(row) + "\n" for row in batch)
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object whose contents are drained after each row group."""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def stream_parquet(rows):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema(
+        [
+            ("id", pa.int64()),
+            ("species", pa.string()),
+            ("observed_on", pa.string()),
+            ("latitude", pa.float64()),
+            ("longitude", pa.float64()),
+            ("tavg", pa.float64()),
+            ("prcp", pa.float64()),
+        ]
+    )
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        # One row group per batch, flushed to the client as it is written.
+        for batch in _batches(rows):
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            data = sink.drain()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+@export_bp.route("/export")
+def export_observations():
+    """
+    Streams a species' observations joined with climate values from the
+    selected stations. Query parameters:
+      species   - species name (required)
+      stations  - comma-separated Meteostat station ids (required)
+      format    - csv (default), ndjson or parquet
+
+    Serialisation is batched, so the output is never built up in memory. The
+    observations themselves come from the inat cache: for a species that is
+    not cached yet, the full crawl runs before the first byte is sent and its
+    raw results stay in memory (as they do for the map and graph). If the
+    crawl is incomplete a 502 is returned instead of a truncated file.
+    """
+    species = request.args.get("species", "").strip()
+    station_ids = [
+        s.strip() for s in request.args.get("stations", "").split(",") if s.strip()
+    ]
+    fmt = request.args.get("format", "csv").lower()
+    if not species:
+        return jsonify({"error": "No species provided"}), 400
+    if not station_ids:
+        return jsonify({"error": "Please select at least one weather station."}), 400
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"error": f"Unsupported format: {fmt}"}), 400
+    if fmt == "parquet":
+        try:
+            import pyarrow.parquet  # noqa: F401
+        except ImportError:
+            return jsonify({"error": "Parquet export requires pyarrow"}), 501
+
+    start_date = "2015-01-01"
+    end_date = "2025-04-01"
+    # Both come from the in-process caches when the species/stations have
+    # already been loaded for the map or graph.
+    try:
+        observations, _ = inat.fetch_all_inat_data(
+            species, force=False, raise_on_incomplete=True
+        )
+    except inat.InatFetchError as e:
+        return jsonify({"error": str(e)}), 502
+    climate = weather.monthly_climate_by_year_month(station_ids, start_date, end_date)
+
+    rows = iter_export_rows(species, observations, climate)
+    if fmt == "csv":
+        body = stream_csv(rows)
+    elif fmt == "ndjson":
+        body = stream_ndjson(rows)
+    else:
+        body = stream_parquet(rows)
+
+    mimetype, ext = EXPORT_FORMATS[fmt]
+    filename = species.lower().replace(" ", "_") + "." + ext
+    return Response(
+        body,
+        mimetype=mimetype,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -0,0 +1,164 @@
+# http_client.py
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+
+# Default (connect, read) timeout in seconds for every upstream call.
+DEFAULT_TIMEOUT = (10, 30)
+# How many times a single request is retried after a 429/5xx or network error.
+MAX_RETRIES = 5
+# Maximum number of in-flight requests to any one host.
+MAX_CONNECTIONS_PER_HOST = 4
+# Backoff bounds (seconds) applied per host.
+BASE_BACKOFF = 1.0
+MAX_BACKOFF = 60.0
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+USER_AGENT = "HerpsMapper (+https://github.com/armstrongm360/herpsmapper)"
+
+_session = None
+_session_lock = threading.Lock()
+_hosts = {}
+_hosts_lock = threading.Lock()
+
+
+class _HostState:
+    """
+    Per-host throttling state: a semaphore capping concurrent requests and an
+    adaptive delay that grows on 429/5xx responses and decays on success.
+    """
+
+    def __init__(self):
+        self.semaphore = threading.BoundedSemaphore(MAX_CONNECTIONS_PER_HOST)
+        self.lock = threading.Lock()
+        self.delay = 0.0
+        self.not_before = 0.0
+
+    def wait_turn(self):
+        with self.lock:
+            wait = self.not_before - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+
+    def penalize(self, retry_after=None):
+        with self.lock:
+            if retry_after is not None:
+                self.delay = min(max(retry_after, BASE_BACKOFF), MAX_BACKOFF)
+            else:
+                self.delay = min(max(self.delay * 2, BASE_BACKOFF), MAX_BACKOFF)
+            # Jitter so concurrent workers don't retry in lockstep.
+            pause = self.delay * (1 + random.uniform(0, 0.25))
+            self.not_before = max(self.not_before, time.monotonic() + pause)
+            return pause
+
+    def reward(self):
+        with self.lock:
+            self.delay = self.delay / 2 if self.delay > BASE_BACKOFF / 8 else 0.0
+
+
+def get_session():
+    """
+    Returns the process-wide requests.Session, creating it on first use.
+    The session keeps connections alive so repeated calls to the same host
+    reuse one TLS connection instead of handshaking per request.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=16, pool_maxsize=MAX_CONNECTIONS_PER_HOST
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                # Identify the app to upstream APIs (iNat asks clients to).
+                session.headers["User-Agent"] = USER_AGENT
+                _session = session
+    return _session
+
+
+def _host_state(host):
+    with _hosts_lock:
+        state = _hosts.get(host)
+        if state is None:
+            state = _hosts[host] = _HostState()
+        return state
+
+
+def _parse_retry_after(value):
+    """
+    Parses a Retry-After header (either delta-seconds or an HTTP date).
+    Returns the delay in seconds, or None if it is absent or malformed.
+    """
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def get(url, params=None, timeout=DEFAULT_TIMEOUT, retries=MAX_RETRIES, **kwargs):
+    """
+    GET through the shared session, honouring the per-host concurrency limit.
+    429 and 5xx responses and connection errors are retried with backoff
+    (Retry-After is respected when the server sends it).
+
+    Returns:
+        The final requests.Response. If every retry failed with a retryable
+        status the last response is returned so callers can inspect it; if
+        every retry raised, the last exception is re-raised.
+    """
+    host = urlparse(url).netloc
+    state = _host_state(host)
+    session = get_session()
+    attempt = 0
+    while True:
+        state.wait_turn()
+        start = time.perf_counter()
+        try:
+            with state.semaphore:
+                response = session.get(url, params=params, timeout=timeout, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            metrics.UPSTREAM_LATENCY.observe(time.perf_counter() - start, host=host)
+            metrics.UPSTREAM_REQUESTS.inc(host=host, status=type(e).__name__)
+            if attempt >= retries:
+                raise
+            pause = state.penalize()
+            print(
+                f"DEBUG: {type(e).__name__} for {url}; retry {attempt + 1}/{retries} in {pause:.1f}s"
+            )
+            attempt += 1
+            continue
+
+        metrics.UPSTREAM_LATENCY.observe(time.perf_counter() - start, host=host)
+        metrics.UPSTREAM_REQUESTS.inc(host=host, status=response.status_code)
+        if not kwargs.get("stream"):
+            metrics.UPSTREAM_SIZE.observe(len(response.content), host=host)
+
+        if response.status_code not in RETRY_STATUSES:
+            state.reward()
+            return response
+        if attempt >= retries:
+            return response
+
+        retry_after = _parse_retry_after(response.headers.get("Retry-After"))
+        pause = state.penalize(retry_after)
+        print(
+            f"DEBUG: Status {response.status_code} for {url}; retry {attempt + 1}/{retries} in {pause:.1f}s"
+        )
+        response.close()
+        attempt += 1
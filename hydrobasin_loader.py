@@ -0,0 +1,230 @@
+# hydrobasin_loader.py
+"""
+Serves IUCN HydroBASINS distributions (IUCN_files/reptilia_hydrobasin).
+
+The CSVs are too large to scan per request, so they are converted once into
+an indexed SQLite store (hydrobasin_index.db) holding:
+  - species_basins: (species, hybas_id), clustered by species
+  - basins: hybas_id -> bounding box + WKB geometry
+
+Build it with:
+    python hydrobasin_loader.py
+"""
+
+import csv
+import json
+import os
+import sqlite3
+import sys
+from flask import Blueprint, request, jsonify
+
+hydrobasin_bp = Blueprint("hydrobasin", __name__)
+
+HYDROBASIN_CSV_FOLDER = os.path.join("IUCN_files", "reptilia_hydrobasin")
+# HydroBASINS polygon shapefiles (hybas_*_lev*.shp) with a HYBAS_ID field.
+HYDROBASIN_SHP_FOLDER = os.path.join("IUCN_files", "hydrobasins")
+HYDROBASIN_DB = "hydrobasin_index.db"
+
+# Column names used by the different IUCN export versions.
+SPECIES_COLUMNS = ("sci_name", "binomial")
+BASIN_COLUMNS = ("hybas_id", "HYBAS_ID")
+
+_INSERT_BATCH = 10000
+
+
+def _pick_column(fieldnames, candidates):
+    for name in candidates:
+        if name in fieldnames:
+            return name
+    return None
+
+
+def build_hydrobasin_index(
+    csv_folder=HYDROBASIN_CSV_FOLDER,
+    shp_folder=HYDROBASIN_SHP_FOLDER,
+    db_path=HYDROBASIN_DB,
+):
+    """
+    Converts the hydrobasin CSVs (and the geometries of every basin they
+    reference) into the SQLite index at db_path, replacing any existing one.
+
+    Returns:
+        A tuple (species_basin_rows, basin_geometries).
+    """
+    tmp_path = db_path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    conn.executescript("""
+        PRAGMA journal_mode = OFF;
+        PRAGMA synchronous = OFF;
+        CREATE TABLE species_basins (
+            species TEXT NOT NULL,
+            hybas_id INTEGER NOT NULL,
+            PRIMARY KEY (species, hybas_id)
+        ) WITHOUT ROWID;
+        CREATE TABLE basins (
+            hybas_id INTEGER PRIMARY KEY,
+            minx REAL, miny REAL, maxx REAL, maxy REAL,
+            geom BLOB
+        );
+        """)
+
+    for filename in sorted(os.listdir(csv_folder)):
+        if not filename.lower().endswith(".csv"):
+            continue
+        path = os.path.join(csv_folder, filename)
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            reader = csv.DictReader(f)
+            species_col = _pick_column(reader.fieldnames or [], SPECIES_COLUMNS)
+            basin_col = _pick_column(reader.fieldnames or [], BASIN_COLUMNS)
+            if not species_col or not basin_col:
+                print(f"Skipping {filename}: no species/hybas_id columns")
+                continue
+            batch = []
+            for row in reader:
+                species = (row.get(species_col) or "").strip().lower()
+                try:
+                    hybas_id = int(float(row.get(basin_col) or ""))
+                except ValueError:
+                    continue
+                if species:
+                    batch.append((species, hybas_id))
+                if len(batch) >= _INSERT_BATCH:
+                    conn.executemany(
+                        "INSERT OR IGNORE INTO species_basins VALUES (?, ?)", batch
+                    )
+                    batch = []
+            conn.executemany(
+                "INSERT OR IGNORE INTO species_basins VALUES (?, ?)", batch
+            )
+        print(f"Indexed {filename}")
+
+    basin_count = 0
+    if os.path.isdir(shp_folder):
+        import geopandas as gpd
+
+        wanted = {
+            r[0] for r in conn.execute("SELECT DISTINCT hybas_id FROM species_basins")
+        }
+        for filename in sorted(os.listdir(shp_folder)):
+            if not filename.lower().endswith(".shp"):
+                continue
+            gdf = gpd.read_file(os.path.join(shp_folder, filename))
+            id_col = _pick_column(gdf.columns, BASIN_COLUMNS)
+            if id_col is None:
+                print(f"Skipping {filename}: no HYBAS_ID column")
+                continue
+            gdf = gdf[gdf[id_col].astype("int64").isin(wanted)]
+            rows = []
+            for hybas_id, geom in zip(gdf[id_col], gdf.geometry):
+                if geom is None:
+                    continue
+                minx, miny, maxx, maxy = geom.bounds
+                rows.append((int(hybas_id), minx, miny, maxx, maxy, geom.wkb))
+            conn.executemany(
+                "INSERT OR REPLACE INTO basins VALUES (?, ?, ?, ?, ?, ?)", rows
+            )
+            basin_count += len(rows)
+            print(f"Indexed {len(rows)} basins from {filename}")
+    else:
+        print(f"Basin shapefile folder '{shp_folder}' not found; storing IDs only.")
+
+    conn.commit()
+    pair_count = conn.execute("SELECT COUNT(*) FROM species_basins").fetchone()[0]
+    conn.close()
+    os.replace(tmp_path, db_path)
+    return pair_count, basin_count
+
+
+def _connect():
+    return sqlite3.connect(f"file:{HYDROBASIN_DB}?mode=ro", uri=True)
+
+
+@hydrobasin_bp.route("/get_hydrobasins")
+def get_hydrobasins():
+    """
+    Returns the species' hydrobasin IDs plus, as GeoJSON features, the basin
+    geometries intersecting the viewport (north/west/south/east), clipped to it.
+    Without a viewport every basin geometry is returned unclipped; a partial
+    or non-numeric viewport is rejected with 400.
+    """
+    species = request.args.get("species", "").strip()
+    if not species:
+        return jsonify({"error": "No species provided"}), 400
+    raw_bounds = [request.args.get(k) for k in ("north", "west", "south", "east")]
+    bounds = None
+    if any(v is not None for v in raw_bounds):
+        try:
+            bounds = [float(v) for v in raw_bounds]
+        except (TypeError, ValueError):
+            return (
+                jsonify({"error": "north, west, south and east must all be numbers"}),
+                400,
+            )
+    if not os.path.exists(HYDROBASIN_DB):
+        return jsonify({"error": "Hydrobasin index not built"}), 503
+
+    species_clean = species.lower()
+    conn = _connect()
+    try:
+        hybas_ids = [
+            r[0]
+            for r in conn.execute(
+                "SELECT hybas_id FROM species_basins WHERE species = ?",
+                (species_clean,),
+            )
+        ]
+        if not hybas_ids:
+            return (
+                jsonify({"error": f"No hydrobasin data found for species: {species}"}),
+                404,
+            )
+        sql = (
+            "SELECT b.hybas_id, b.geom FROM species_basins s "
+            "JOIN basins b ON b.hybas_id = s.hybas_id WHERE s.species = ?"
+        )
+        params = [species_clean]
+        viewport = None
+        if bounds is not None:
+            # The join is driven by the species_basins primary key, so the
+            # bounding-box test only runs over that species' basins.
+            north, west, south, east = bounds
+            sql += " AND b.maxx >= ? AND b.minx <= ? AND b.maxy >= ? AND b.miny <= ?"
+            params += [west, east, south, north]
+            viewport = (west, south, east, north)
+        geometries = conn.execute(sql, params).fetchall()
+    finally:
+        conn.close()
+
+    from shapely import wkb
+    from shapely.geometry import mapping
+    from shapely.ops import clip_by_rect
+
+    features = []
+    for hybas_id, blob in geometries:
+        geom = wkb.loads(blob)
+        if viewport is not None:
+            geom = clip_by_rect(geom, *viewport)
+            if geom.is_empty:
+                continue
+        features.append(
+            {
+                "type": "Feature",
+                "properties": {"hybas_id": hybas_id},
+                "geometry": mapping(geom),
+            }
+        )
+
+    body = json.dumps(
+        {"type": "FeatureCollection", "hybas_ids": hybas_ids, "features": features}
+    )
+    return body, 200, {"Content-Type": "application/json"}
+
+
+if __name__ == "__main__":
+    # Optional positional overrides: csv_folder shp_folder db_path
+    args = sys.argv[1:4]
+    pairs, basins = build_hydrobasin_index(*args)
+    db_path = args[2] if len(args) > 2 else HYDROBASIN_DB
+    print(f"Wrote {db_path}: {pairs} species/basin rows, {basins} basins")
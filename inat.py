@@ -1,12 +1,21 @@
 # inat.py
-import requests
+import itertools
 import json
 import time
-import pandas as pd
+import http_client
+import metrics
+
+INAT_URL = "https://api.inaturalist.org/v1/observations"
+PER_PAGE = 200
 
 # Global cache for iNaturalist data keyed by species.
 _inat_cache = {}
 _last_species = None
+# Version stamped on each species whenever fresh data is stored, so results
+# derived from it (e.g. the /generate_graph cache) know when to recompute.
+# Deliberately not reset by clear_inat_cache().
+_inat_versions = {}
+_versions = itertools.count(1)
 
 
 def clear_inat_cache():
@@ -17,11 +26,94 @@ def clear_inat_cache():
     _inat_cache = {}
 
 
-def fetch_all_inat_data(species, use_cache=True, force=False):
+def _store_in_cache(species, all_results, total_obs):
+    _inat_cache[species] = (all_results, total_obs)
+    _inat_versions[species] = next(_versions)
+
+
+def is_cached(species):
+    """
+    Returns True if complete data for the species is currently cached.
+    """
+    return species in _inat_cache
+
+
+def cache_version(species):
+    """
+    Returns the version of the most recently stored data for the species,
+    or None if a complete fetch has never been stored.
+    """
+    return _inat_versions.get(species)
+
+
+class InatFetchError(RuntimeError):
+    """A page could not be fetched, even after http_client's retries."""
+
+
+def _inat_params(species, id_above=None):
+    # Keyset pagination: iNat refuses page/per_page requests past 10,000
+    # results, so each request asks for the next ids after the last one seen.
+    params = {
+        "taxon_name": species,
+        "per_page": PER_PAGE,
+        "order_by": "id",
+        "order": "asc",
+        "verifiable": "true",
+    }
+    if id_above is not None:
+        params["id_above"] = id_above
+    return params
+
+
+def _iter_result_pages(species):
+    """
+    Generator over a species' observations, one page at a time.
+
+    Yields:
+        Tuples (page, total_obs_header, results); total_obs_header comes from
+        the first response's X-Total-Entries header.
+
+    Raises:
+        InatFetchError if a page fails after http_client's retries.
+    """
+    page = 1
+    last_id = None
+    total_obs_header = None
+    while True:
+        print(f"DEBUG: Requesting page {page} for species: {species}")
+        try:
+            response = http_client.get(INAT_URL, params=_inat_params(species, last_id))
+        except Exception as e:
+            raise InatFetchError(f"Exception on page {page}: {e}") from e
+        if response.status_code != 200:
+            raise InatFetchError(
+                f"Failed to fetch page {page} (status {response.status_code})"
+            )
+        if page == 1:
+            total_obs_header = int(response.headers.get("X-Total-Entries", 0))
+            print(f"DEBUG: X-Total-Entries header: {total_obs_header}")
+        try:
+            results = response.json().get("results", [])
+        except ValueError as e:
+            raise InatFetchError(f"Invalid JSON on page {page}: {e}") from e
+
+        yield page, total_obs_header, results
+        if len(results) < PER_PAGE:
+            return  # No more pages available.
+        last_id = results[-1]["id"]
+        page += 1
+
+
+def fetch_all_inat_data(
+    species, use_cache=True, force=False, raise_on_incomplete=False
+):
     """
     Fetches all iNaturalist observations for the given species.
     If use_cache is True and force is False and data for that species is cached,
     the cached data is returned. Otherwise, a fresh API call is made.
+    If a page still fails after http_client's retries, the pages fetched so far
+    are returned (and not cached), or InatFetchError is raised if
+    raise_on_incomplete is True.
 
     Returns:
         A tuple (all_results, total_obs) where:
@@ -35,49 +127,28 @@ def fetch_all_inat_data(species, use_cache=True, force=False):
         _last_species = species
 
     if use_cache and species in _inat_cache:
+        metrics.CACHE_REQUESTS.inc(cache="inat", result="hit")
         print(f"DEBUG: Returning cached data for species: {species}")
         return _inat_cache[species]
+    metrics.CACHE_REQUESTS.inc(cache="inat", result="miss")
 
-    inat_url = "https://api.inaturalist.org/v1/observations"
-    params = {
-        "taxon_name": species,
-        "per_page": 200,
-        "order": "asc",
-        "verifiable": "true",
-    }
     all_results = []
     total_obs_header = None
-    page = 1
+    pages = 0
+    error = None
 
     print(f"DEBUG: Starting API calls for species: {species}")
     start_time = time.time()
 
-    while True:
-        params["page"] = page
-        try:
-            response = requests.get(inat_url, params=params)
-            print(f"DEBUG: Requesting page {page} for species: {species}")
-            if response.status_code != 200:
-                print(
-                    f"DEBUG: Error: Received status code {response.status_code} on page {page}"
-                )
-                break
-            if page == 1:
-                total_obs_header = int(response.headers.get("X-Total-Entries", 0))
-                print(f"DEBUG: X-Total-Entries header: {total_obs_header}")
-            data_page = response.json()
-        except Exception as e:
-            print(f"DEBUG: Exception on page {page}: {e}")
-            break
-
-        results = data_page.get("results", [])
-        print(f"DEBUG: Fetched {len(results)} observations on page {page}")
-        if not results:
-            break
-        all_results.extend(results)
-        if len(results) < params["per_page"]:
-            break  # No more pages available.
-        page += 1
+    try:
+        for page, total_obs_header, results in _iter_result_pages(species):
+            print(f"DEBUG: Fetched {len(results)} observations on page {page}")
+            pages = page
+            all_results.extend(results)
+    except InatFetchError as e:
+        print(f"DEBUG: Error: {e}")
+        error = e
+    metrics.INAT_PAGES.observe(pages)
 
     total_obs = (
         total_obs_header
@@ -89,7 +160,14 @@ def fetch_all_inat_data(species, use_cache=True, force=False):
         f"DEBUG: Finished fetching data for species: {species} in {end_time - start_time:.2f} seconds. Total observations: {total_obs}"
     )
 
-    _inat_cache[species] = (all_results, total_obs)
+    # Don't cache a truncated result; the next request should try again.
+    if error is None:
+        _store_in_cache(species, all_results, total_obs)
+    elif raise_on_incomplete:
+        raise InatFetchError(
+            f"iNaturalist fetch for {species} incomplete: {error}; "
+            f"got {len(all_results)} of {total_obs} observations"
+        )
     return (all_results, total_obs)
 
 
@@ -111,51 +189,34 @@ def stream_inat_data(species, force=False):
         _last_species = species
 
     if species in _inat_cache:
+        metrics.CACHE_REQUESTS.inc(cache="inat", result="hit")
         print(
             f"DEBUG: Data for species '{species}' found in cache. Streaming cached data."
         )
         yield f"CACHED|{json.dumps({'results': _inat_cache[species][0]})}"
         return
+    metrics.CACHE_REQUESTS.inc(cache="inat", result="miss")
 
-    inat_url = "https://api.inaturalist.org/v1/observations"
-    params = {
-        "taxon_name": species,
-        "per_page": 200,
-        "order": "asc",
-        "verifiable": "true",
-    }
     all_results = []
     total_obs_header = None
-    page = 1
+    pages = 0
+    complete = True
 
     print(f"DEBUG: Starting streaming API calls for species: {species}")
     start_time = time.time()
 
-    while True:
-        params["page"] = page
-        try:
-            response = requests.get(inat_url, params=params)
-            print(f"DEBUG: Streaming: Requesting page {page} for species: {species}")
-            if response.status_code != 200:
-                yield f"ERROR: Failed to fetch page {page} (status {response.status_code})"
-                break
-            if page == 1:
-                total_obs_header = int(response.headers.get("X-Total-Entries", 0))
-                print(f"DEBUG: Streaming: X-Total-Entries header: {total_obs_header}")
-            data_page = response.json()
-        except Exception as e:
-            yield f"ERROR: Exception on page {page}: {e}"
-            break
-
-        results = data_page.get("results", [])
-        print(f"DEBUG: Streaming: Fetched {len(results)} observations on page {page}")
-        yield f"{page}"
-        if not results:
-            break
-        all_results.extend(results)
-        if len(results) < params["per_page"]:
-            break  # No more pages.
-        page += 1
+    try:
+        for page, total_obs_header, results in _iter_result_pages(species):
+            print(
+                f"DEBUG: Streaming: Fetched {len(results)} observations on page {page}"
+            )
+            pages = page
+            yield f"{page}"
+            all_results.extend(results)
+    except InatFetchError as e:
+        complete = False
+        yield f"ERROR: {e}"
+    metrics.INAT_PAGES.observe(pages)
 
     total_obs = (
         total_obs_header
@@ -166,7 +227,8 @@ def stream_inat_data(species, force=False):
     print(
         f"DEBUG: Streaming: Finished fetching data for species: {species} in {end_time - start_time:.2f} seconds. Total observations: {total_obs}"
     )
-    _inat_cache[species] = (all_results, total_obs)
+    if complete:
+        _store_in_cache(species, all_results, total_obs)
     yield f"FINISHED|{json.dumps({'results': all_results})}"
 
 
@@ -176,6 +238,8 @@ def aggregate_inat_observations(all_results):
 
     Returns a pandas DataFrame with months 1-12 as the index and a column 'observations'.
     """
+    import pandas as pd
+
     obs_counts = {}
     for obs in all_results:
         observed_on = obs.get("observed_on")
@@ -1,6 +1,5 @@
 # iucn_loader.py
 import os
-import geopandas as gpd
 from flask import Blueprint, request, jsonify
 
 iucn_bp = Blueprint("iucn", __name__)
@@ -15,6 +14,9 @@ def get_iucn_polygon():
     if not species:
         return jsonify({"error": "No species provided"}), 400
 
+    # geopandas is slow to import; load it on the first polygon request.
+    import geopandas as gpd
+
     species_clean = species.strip().lower()
     # List all shapefiles in the IUCN folder.
     shp_files = [
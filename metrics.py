@@ -0,0 +1,189 @@
+# metrics.py
+"""
+Minimal in-process metrics registry rendered in the Prometheus text
+exposition format (served by the /metrics route in app.py).
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+# Latency buckets in seconds, from a cached lookup up to a full iNat crawl.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+# Payload size buckets in bytes (1 KB .. 64 MB).
+SIZE_BUCKETS = tuple(1024 * 4**i for i in range(9))
+# Pages per iNat crawl (200 observations each).
+PAGE_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+_registry = []
+_lock = threading.Lock()
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonically increasing value per label set."""
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        with _lock:
+            _registry.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with _lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        return self._values.get(key, 0)
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} counter",
+        ]
+        for key, value in sorted(self._values.items()):
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}{labels} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """Cumulative bucketed observations per label set."""
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._values = {}
+        with _lock:
+            _registry.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with _lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Context manager observing the elapsed wall time in seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        for key, (counts, total, count) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                le = f'le="{_format_value(bound)}"'
+                labels = _format_labels(self.labelnames, key, le)
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+@contextmanager
+def upstream_call(host):
+    """
+    Records a non-HTTP upstream call (e.g. a Meteostat fetch) in the same
+    upstream count/latency metrics http_client uses. The status label is
+    "ok", or the exception class name if the call raised.
+    """
+    status = "ok"
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        status = type(e).__name__
+        raise
+    finally:
+        UPSTREAM_LATENCY.observe(time.perf_counter() - start, host=host)
+        UPSTREAM_REQUESTS.inc(host=host, status=status)
+
+
+def render():
+    """Returns every registered metric in Prometheus text format."""
+    with _lock:
+        metrics = list(_registry)
+    lines = []
+    for metric in metrics:
+        with _lock:
+            lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# Metrics shared across modules.
+REQUEST_LATENCY = Histogram(
+    "herps_request_duration_seconds",
+    "Flask route latency in seconds.",
+    ("route", "method", "status"),
+)
+RESPONSE_SIZE = Histogram(
+    "herps_response_size_bytes",
+    "Flask response payload size in bytes.",
+    ("route",),
+    buckets=SIZE_BUCKETS,
+)
+UPSTREAM_REQUESTS = Counter(
+    "herps_upstream_requests_total",
+    "Upstream calls (HTTP requests including retries, Meteostat fetches) by host and status.",
+    ("host", "status"),
+)
+UPSTREAM_LATENCY = Histogram(
+    "herps_upstream_duration_seconds",
+    "Upstream call latency in seconds.",
+    ("host",),
+)
+UPSTREAM_SIZE = Histogram(
+    "herps_upstream_response_size_bytes",
+    "Upstream HTTP response payload size in bytes.",
+    ("host",),
+    buckets=SIZE_BUCKETS,
+)
+INAT_PAGES = Histogram(
+    "herps_inat_crawl_pages",
+    "iNaturalist observation pages fetched per crawl.",
+    buckets=PAGE_BUCKETS,
+)
+CACHE_REQUESTS = Counter(
+    "herps_cache_requests_total",
+    "Cache lookups by cache name and result (hit/miss).",
+    ("cache", "result"),
+)
@@ -1,4 +1,4 @@
-import requests
+import http_client
 from flask import Blueprint, request, jsonify
 
 sqlite_iucn_bp = Blueprint("sqlite_iucn", __name__)
@@ -18,7 +18,7 @@ def get_iucn_polygon_sqlite():
 
     url = BASE_URL + species_file
 
-    response = requests.get(url)
+    response = http_client.get(url)
 
     if response.status_code != 200:
 
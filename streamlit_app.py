@@ -1,11 +1,15 @@
 import streamlit as st
 import pandas as pd
-import requests
+import http_client
+import inat
 import folium
+from folium.plugins import FastMarkerCluster, HeatMap
 from streamlit_folium import st_folium
 
 # Your public R2 base (must end with a slash)
 R2_BASE = "https://pub-24f3dc7f88d741309e78eb1352612cfd.r2.dev/polygon_export/"
+# Above this many points "Auto" rendering switches from markers to clusters.
+MAX_PLAIN_MARKERS = 1000
 
 st.set_page_config(page_title="HerpsMapper", layout="wide")
 st.title("HerpsMapper")
@@ -45,37 +49,64 @@ def species_to_filename(species_name: str) -> str:
     return species_name.strip().lower().replace(" ", "_") + ".geojson"
 
 
+@st.cache_data(show_spinner=False, ttl=24 * 3600, max_entries=64)
 def fetch_polygon_geojson(species_name: str):
+    """
+    Fetches a species polygon from R2, cached per species. A 404 is cached
+    as "not found"; other failures raise so they are retried next time.
+    """
     url = R2_BASE + species_to_filename(species_name)
-    r = requests.get(url, timeout=30)
-    if r.status_code == 200:
-        return r.json(), url
-    return None, url
+    r = http_client.get(url)
+    if r.status_code == 404:
+        return None, url
+    r.raise_for_status()
+    return r.json(), url
 
 
-def fetch_inat_points(species_name: str, limit: int = 500):
+@st.cache_data(
+    show_spinner="Fetching iNaturalist observations...", ttl=3600, max_entries=16
+)
+def fetch_inat_points(species_name: str):
     """
-    Lightweight iNaturalist fetch: grabs up to 'limit' points.
-    (Flask version streams + paginates; keep this simple for Streamlit.)
+    Fetches every iNaturalist observation for the species (same paginated,
+    retried fetch the Flask app uses) and returns ([lat, lon] points, total).
+    Cached per species so reruns don't refetch; an incomplete crawl raises
+    so st.cache_data doesn't keep the partial point set.
     """
-    api = "https://api.inaturalist.org/v1/observations"
-    params = {
-        "taxon_name": species_name,
-        "per_page": min(limit, 200),
-        "page": 1,
-        "verifiable": "true",
-    }
-    r = requests.get(api, params=params, timeout=30)
-    r.raise_for_status()
-    data = r.json()
+    results, total = inat.fetch_all_inat_data(species_name, raise_on_incomplete=True)
     pts = []
-    for obs in data.get("results", []):
+    for obs in results:
         geo = obs.get("geojson")
         if geo and geo.get("type") == "Point":
             lon, lat = geo.get("coordinates", [None, None])
             if lat is not None and lon is not None:
-                pts.append((lat, lon))
-    return pts, data.get("total_results", 0)
+                pts.append([lat, lon])
+    return pts, total
+
+
+def add_points_layer(m, pts, mode: str):
+    """
+    Adds observation points to the map. Individual CircleMarkers emit one
+    JS object each, so larger sets go through FastMarkerCluster (points are
+    passed as a single data array) or a HeatMap layer.
+    """
+    if mode == "Auto":
+        mode = "Markers" if len(pts) <= MAX_PLAIN_MARKERS else "Clusters"
+    if mode == "Heatmap":
+        HeatMap(pts, name="iNaturalist", radius=8, blur=10).add_to(m)
+    elif mode == "Clusters":
+        FastMarkerCluster(pts, name="iNaturalist").add_to(m)
+    else:
+        for lat, lon in pts:
+            folium.CircleMarker(
+                location=[lat, lon],
+                radius=3,
+                color="darkred",
+                fill=True,
+                fill_opacity=0.9,
+                weight=1,
+            ).add_to(m)
+    return mode
 
 
 species_list = load_species_list()
@@ -95,17 +126,34 @@ with left:
         species = st.text_input("Species name (e.g., Gloydius brevicaudus):")
 
     load_poly = st.button("Load polygon (R2)", type="primary")
-    load_inat = st.button("Load iNaturalist points (quick)")
+    load_inat = st.button("Load iNaturalist points")
+    point_mode = st.radio(
+        "Render points as:",
+        options=["Auto", "Clusters", "Heatmap", "Markers"],
+        horizontal=True,
+    )
     st.caption("Polygons are loaded from Cloudflare R2.")
 
+    # Buttons are only True on the rerun they were clicked, so remember what
+    # was loaded; later reruns (mode change, map pan/zoom) redraw the layers
+    # from the cached fetches.
+    if load_poly:
+        st.session_state["poly_species"] = species
+    if load_inat:
+        st.session_state["inat_species"] = species
+
 with right:
     st.subheader("Map")
 
     # China-focused start (matches your original intent better than global)
     m = folium.Map(location=[35, 105], zoom_start=4, tiles="OpenTopoMap")
 
-    if species and load_poly:
-        geojson, url = fetch_polygon_geojson(species)
+    if species and st.session_state.get("poly_species") == species:
+        try:
+            geojson, url = fetch_polygon_geojson(species)
+        except Exception as e:
+            geojson, url = None, None
+            st.error(f"Polygon fetch failed: {e}")
         if geojson:
             folium.GeoJson(
                 geojson,
@@ -118,22 +166,17 @@ with right:
             ).add_to(m)
             folium.LayerControl().add_to(m)
             st.success(f"Polygon loaded from: {url}")
-        else:
+        elif url:
             st.error(f"Polygon not found at: {url}")
 
-    if species and load_inat:
+    if species and st.session_state.get("inat_species") == species:
         try:
-            pts, total = fetch_inat_points(species, limit=500)
-            for lat, lon in pts:
-                folium.CircleMarker(
-                    location=[lat, lon],
-                    radius=3,
-                    color="darkred",
-                    fill=True,
-                    fill_opacity=0.9,
-                    weight=1,
-                ).add_to(m)
-            st.info(f"Loaded {len(pts)} points (of ~{total} total iNat observations).")
+            pts, total = fetch_inat_points(species)
+            used_mode = add_points_layer(m, pts, point_mode)
+            st.info(
+                f"Loaded {len(pts)} points (of ~{total} total iNat observations), "
+                f"shown as {used_mode.lower()}."
+            )
         except Exception as e:
             st.error(f"iNaturalist fetch failed: {e}")
 
@@ -1,31 +1,107 @@
 # weather.py
 from datetime import datetime
-import pandas as pd
-from meteostat import Monthly
+import itertools
+import metrics
 
+# pandas and meteostat are imported inside the functions so that importing
+# this module (and therefore app.py) stays cheap at startup.
 
-def fetch_station_weather(station_id, start_date, end_date):
+# Cache of monthly station data keyed by (station_id, start_date, end_date).
+_weather_cache = {}
+# Version stamped on each key whenever fresh data is stored; not reset by
+# clear_weather_cache() (see inat._inat_versions).
+_weather_versions = {}
+_versions = itertools.count(1)
+
+
+def clear_weather_cache():
+    """
+    Clears the internal cache.
+    """
+    global _weather_cache
+    _weather_cache = {}
+
+
+def is_cached(station_id, start_date, end_date):
+    """
+    Returns True if data for the station and window is currently cached.
+    """
+    return (station_id, start_date, end_date) in _weather_cache
+
+
+def cache_version(station_id, start_date, end_date):
+    """
+    Returns the version of the most recently stored data for the station and
+    window, or None if it has never been fetched successfully.
+    """
+    return _weather_versions.get((station_id, start_date, end_date))
+
+
+def fetch_station_weather(station_id, start_date, end_date, force=False):
     """
     Fetch monthly weather data for a given Meteostat station.
     station_id: Meteostat station identifier.
     start_date, end_date: Strings in "YYYY-MM-DD" format.
+    Successful results are cached; pass force=True to refetch.
 
     Returns:
         A Pandas DataFrame with monthly data (columns include 'tavg' and 'prcp').
+        The frame is shared with the cache, so callers must not modify it in place.
     """
+    key = (station_id, start_date, end_date)
+    if not force and key in _weather_cache:
+        metrics.CACHE_REQUESTS.inc(cache="weather", result="hit")
+        return _weather_cache[key]
+    metrics.CACHE_REQUESTS.inc(cache="weather", result="miss")
+
+    from meteostat import Monthly
+
     start = datetime.strptime(start_date, "%Y-%m-%d")
     end = datetime.strptime(end_date, "%Y-%m-%d")
     try:
-        data = Monthly(station_id, start, end)
-        df = data.fetch()
+        with metrics.upstream_call("meteostat"):
+            df = Monthly(station_id, start, end).fetch()
         if "tavg" not in df.columns and "tmin" in df.columns and "tmax" in df.columns:
             df["tavg"] = (df["tmin"] + df["tmax"]) / 2
-        return df[["tavg", "prcp"]]
+        df = df[["tavg", "prcp"]]
+        _weather_cache[key] = df
+        _weather_versions[key] = next(_versions)
+        return df
     except Exception as e:
         print(f"Error fetching monthly weather data for station {station_id}: {e}")
         return None
 
 
+def monthly_climate_by_year_month(station_ids, start_date, end_date):
+    """
+    Averages the selected stations' monthly data per year and month, e.g.
+    June 2019 and June 2020 stay separate (not a 12-month climatology).
+
+    Returns:
+        A dict mapping (year, month) to a (tavg, prcp) tuple; values missing
+        at every station are None.
+    """
+    import pandas as pd
+
+    sums = {}
+    for sid in station_ids:
+        df = fetch_station_weather(sid, start_date, end_date)
+        if df is None or df.empty:
+            continue
+        for ts, tavg, prcp in zip(pd.to_datetime(df.index), df["tavg"], df["prcp"]):
+            entry = sums.setdefault((ts.year, ts.month), [0.0, 0, 0.0, 0])
+            if pd.notnull(tavg):
+                entry[0] += tavg
+                entry[1] += 1
+            if pd.notnull(prcp):
+                entry[2] += prcp
+                entry[3] += 1
+    return {
+        key: (t_sum / t_n if t_n else None, p_sum / p_n if p_n else None)
+        for key, (t_sum, t_n, p_sum, p_n) in sums.items()
+    }
+
+
 def combine_station_weather(station_ids, station_map, start_date, end_date):
     """
     Fetch monthly weather data for each station in station_ids and combine them.
@@ -34,10 +110,13 @@ def combine_station_weather(station_ids, station_map, start_date, end_date):
     Returns:
         A DataFrame with the mean values for each month (index is the month number).
     """
+    import pandas as pd
+
     station_dfs = []
     for sid in station_ids:
         df = fetch_station_weather(sid, start_date, end_date)
         if df is not None and not df.empty:
+            df = df.copy()  # Cached frame; don't reindex it in place.
             df.index = pd.to_datetime(df.index)
             df.index = df.index.month
             station_dfs.append(df)